@@ -1,12 +1,28 @@
 import argparse
 import sys
-import os
-import csv
 import re
 from re import Pattern
 from pathlib import Path
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Union, Optional
-import textwrap
+
+# Translation table mapping each base to its complement
+COMPLEMENT_TABLE = str.maketrans("ACGTacgt", "TGCAtgca")
+
+# Gene detection over genome involves to consider a thymine instead of
+# an uracile that we would find on the expressed RNA
+# Start codons ATT, ATG, CTG, GTG and TTG (AT[TG]|[ATCG]TG) all have a T in
+# the middle and end with G, or with T after an A: testing the shared middle T
+# first avoids trying each alternative at every position
+START_REGEX = re.compile('[ACGT]T(?:G|(?<=AT)T)')
+STOP_REGEX = re.compile('TA[GA]|TGA')
+# Shine AGGAGGUAA: any occurrence of A?G?GAGG contains GAGG, so the motif
+# reduces to GAGG, GGAG or GG.GG (shortest alternatives first)
+SHINE_REGEX = re.compile('GAGG|GGAG|GG.GG')
+
+# Fasta record of a predicted gene: gene number and wrapped sequence
+FASTA_RECORD = b">gene_%d\n%s\n"
 
 def isfile(path: str) -> Path:  # pragma: no cover
     """Check if path is an existing file.
@@ -60,14 +76,35 @@ def read_fasta(fasta_file: Path) -> str:
     :param fasta_file: (Path) Path to the fasta file.
     :return: (str) Sequence from the genome. 
     """
-    with open(fasta_file, "r") as filin:
-        sequence = ""
-        for line in filin:
-            if not line.startswith(">"):
-                sequence += line.strip("\n").upper()
-        return sequence
+    with open(fasta_file, "rb") as filin:
+        lines = [line.rstrip() for line in filin if not line.startswith(b">")]
+    return b"".join(lines).upper().decode("ascii")
+
+
+
+
+def find_motifs(regex: Pattern, sequence: str) -> List[int]:
+    """Find every occurrence of a motif, including overlapping ones.
+
+    :param regex: A regex object that identifies the motif.
+    :param sequence: (str) Sequence from the genome
+    :return: (list) Sorted positions of the motif in the sequence.
+    """
+    lookahead = re.compile("(?={})".format(regex.pattern), regex.flags)
+    return [match.start(0) for match in lookahead.finditer(sequence)]
 
 
+def find_motifs_by_phase(regex: Pattern, sequence: str) -> List[List[int]]:
+    """Find every occurrence of a motif, sorted by reading frame.
+
+    :param regex: A regex object that identifies the motif.
+    :param sequence: (str) Sequence from the genome
+    :return: (list) For each reading frame (position % 3), sorted positions of the motif.
+    """
+    motifs_by_phase = [[], [], []]
+    for position in find_motifs(regex, sequence):
+        motifs_by_phase[position % 3].append(position)
+    return motifs_by_phase
 
 
 def find_start(start_regex: Pattern, sequence: str, start: int, stop: int) -> Union[int, None]:
@@ -100,29 +137,37 @@ def find_stop(stop_regex: Pattern, sequence: str, start: int) -> Union[int, None
             if (match.start(0)-start)%3 == 0:
                 return match.start(0)
     return None
-    
 
 
-def has_shine_dalgarno(shine_regex: Pattern, sequence: str, start: int, max_shine_dalgarno_distance: int) -> bool:
+
+def has_shine_dalgarno(shine_regex: Pattern, sequence: str, start: int, max_shine_dalgarno_distance: int,
+                       shines: Optional[List[int]] = None) -> bool:
     """Find a shine dalgarno motif before the start codon
 
     :param shine_regexp: A regex object that identifies a shine-dalgarno motif.
     :param sequence: (str) Sequence from the genome
     :param start: (int) Position of the start in the genome
     :param max_shine_dalgarno_distance: (int) Maximum distance of the shine dalgarno to the start position
+    :param shines: (list) If given, sorted positions of the shine-dalgarno motifs in the sequence.
     :return: (boolean) true -> has a shine dalgarno upstream to the gene, false -> no
     """
     new_start = start-max_shine_dalgarno_distance
     # making sure that we are still within the sequence's bound
     if new_start >= 0:
+        if shines is not None:
+            # no need to search when no motif begins within the window
+            index = bisect_left(shines, new_start)
+            if index == len(shines) or shines[index] >= start-6:
+                return False
         matches = shine_regex.search(sequence, new_start, start-6)
         if matches:
             return True
     return False
 
 
-def predict_genes(sequence: str, start_regex: Pattern, stop_regex: Pattern, shine_regex: Pattern, 
-                  min_gene_len: int, max_shine_dalgarno_distance: int, min_gap: int) -> List[List[int]]:
+def predict_genes(sequence: str, start_regex: Pattern = START_REGEX, stop_regex: Pattern = STOP_REGEX,
+                  shine_regex: Pattern = SHINE_REGEX, min_gene_len: int = 50,
+                  max_shine_dalgarno_distance: int = 16, min_gap: int = 40) -> List[List[int]]:
     """Predict most probable genes
 
     :param sequence: (str) Sequence from the genome.
@@ -134,23 +179,35 @@ def predict_genes(sequence: str, start_regex: Pattern, stop_regex: Pattern, shin
     :param min_gap: (int) Minimum distance between two genes.
     :return: (list) List of [start, stop] position of each predicted genes.
     """
+    # Scan the genome once for each motif, stops being sorted by reading frame
+    starts = find_motifs(start_regex, sequence)
+    stops_by_phase = find_motifs_by_phase(stop_regex, sequence)
+    shines = find_motifs(shine_regex, sequence)
+    # Local names avoid global and attribute lookups in the loop below
+    find_next = bisect_left
+    has_shine = has_shine_dalgarno
+    sequence_len = len(sequence)
+    nb_starts = len(starts)
     current_position = 0
     identified_genes = []
-    while len(sequence) - current_position >= min_gap:
-        current_position = find_start(start_regex, sequence, current_position, len(sequence))
-        if current_position:
-            stop = find_stop(stop_regex, sequence, current_position)
-            if stop:
-                if (stop-current_position+3) > min_gene_len:
-                    if has_shine_dalgarno(shine_regex, sequence, current_position, max_shine_dalgarno_distance):
-                        identified_genes.append([current_position+1, stop+2+1])
-                        current_position = stop + 2 + min_gap
-                    else:
-                        current_position += 1
-                else:
-                    current_position += 1
-            else:
-                current_position += 1
+    while sequence_len - current_position >= min_gap:
+        # next start codon from the current position
+        index = find_next(starts, current_position)
+        if index == nb_starts:
+            break
+        current_position = starts[index]
+        # next stop codon in the same reading frame as the start
+        stops = stops_by_phase[current_position % 3]
+        index = find_next(stops, current_position)
+        if index < len(stops):
+            stop = stops[index]
+            if (stop-current_position+3) > min_gene_len:
+                if has_shine(shine_regex, sequence, current_position, max_shine_dalgarno_distance,
+                             shines):
+                    identified_genes.append([current_position+1, stop+2+1])
+                    current_position = stop + 2 + min_gap
+                    continue
+        current_position += 1
     return identified_genes
 
 
@@ -162,13 +219,23 @@ def write_genes_pos(predicted_genes_file: Path, probable_genes: List[List[int]])
     """
     try:
         with predicted_genes_file.open("wt") as predict_genes:
-            predict_genes_writer = csv.writer(predict_genes, delimiter=",")
-            predict_genes_writer.writerow(["Start", "Stop"])
-            predict_genes_writer.writerows(probable_genes)
+            # positions are integers, so no csv quoting is needed (same line ending as csv.writer)
+            predict_genes.write("Start,Stop\r\n")
+            predict_genes.writelines("{0},{1}\r\n".format(start, stop) for start, stop in probable_genes)
     except IOError:
         sys.exit("Error cannot open {}".format(predicted_genes_file))
 
 
+def wrap_sequence(sequence: bytes, width: int = 70) -> bytes:
+    """Split a sequence in lines of fixed width.
+
+    :param sequence: (bytes) DNA Sequence.
+    :param width: (int) Maximum length of each line.
+    :return: (bytes) Sequence with a line break every width bases.
+    """
+    return b"\n".join([sequence[i:i+width] for i in range(0, len(sequence), width)])
+
+
 def write_genes(fasta_file: Path, sequence: str, probable_genes: List[List[int]], sequence_rc: str, 
                 probable_genes_comp: List[List[int]]):
     """Write gene sequence in fasta format
@@ -179,17 +246,18 @@ def write_genes(fasta_file: Path, sequence: str, probable_genes: List[List[int]]
     :param sequence_rc: (str) Sequence of genome file in 3' -> 5'.
     :param probable_genes_comp: (list)List of [start, stop] position of each predicted genes in 3' -> 5'.
     """
+    # genes are sliced from the encoded genomes and written as is
+    sequence_bytes = sequence.encode("ascii")
+    sequence_rc_bytes = sequence_rc.encode("ascii")
     try:
-        with open(fasta_file, "wt") as fasta:
-            for i,gene_pos in enumerate(probable_genes):
-                fasta.write(">gene_{0}{1}{2}{1}".format(
-                    i+1, os.linesep, 
-                    textwrap.fill(sequence[gene_pos[0]-1:gene_pos[1]])))
-            i = i+1
-            for j,gene_pos in enumerate(probable_genes_comp):
-                fasta.write(">gene_{0}{1}{2}{1}".format(
-                            i+1+j, os.linesep,
-                            textwrap.fill(sequence_rc[gene_pos[0]-1:gene_pos[1]])))
+        with open(fasta_file, "wb") as fasta:
+            fasta.writelines(FASTA_RECORD % (
+                             i+1, wrap_sequence(sequence_bytes[gene_pos[0]-1:gene_pos[1]]))
+                             for i,gene_pos in enumerate(probable_genes))
+            i = len(probable_genes)
+            fasta.writelines(FASTA_RECORD % (
+                             i+1+j, wrap_sequence(sequence_rc_bytes[gene_pos[0]-1:gene_pos[1]]))
+                             for j,gene_pos in enumerate(probable_genes_comp))
     except IOError:
         sys.exit("Error cannot open {}".format(fasta_file))
 
@@ -200,8 +268,17 @@ def reverse_complement(sequence: str) -> str:
     :param sequence: (str) DNA Sequence.
     :return: (str) Reverse complemented sequence.
     """
-    complement = {'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A'}
-    return ''.join([complement[base] for base in sequence[::-1]])
+    return sequence.translate(COMPLEMENT_TABLE)[::-1]
+
+
+def reverse_positions(probable_genes: List[List[int]], sequence_len: int) -> List[List[int]]:
+    """Convert gene positions on the reverse complement to positions on the genome.
+
+    :param probable_genes: (list) List of [start, stop] position of each predicted genes in 3' -> 5'.
+    :param sequence_len: (int) Length of the genome.
+    :return: (list) List of [start, stop] position of each predicted genes in 5' -> 3'.
+    """
+    return [[sequence_len - stop + 1, sequence_len - start + 1] for start, stop in probable_genes]
 
 
 #==============================================================
@@ -211,15 +288,6 @@ def main() -> None: # pragma: no cover
     """
     Main program function
     """
-    # Gene detection over genome involves to consider a thymine instead of
-    # an uracile that we would find on the expressed RNA
-    start_codons = ['TTG', 'CTG', 'ATT', 'ATG', 'GTG']
-    stop_codons = ['TAA', 'TAG', 'TGA']
-    start_regex = re.compile('AT[TG]|[ATCG]TG')
-    stop_regex = re.compile('TA[GA]|TGA')
-    # Shine AGGAGGUAA
-    #AGGA ou GGAGG 
-    shine_regex = re.compile('A?G?GAGG|GGAG|GG.{1}GG')
     # Arguments
     args = get_arguments()
     min_gene_len = args.min_gene_len
@@ -231,19 +299,21 @@ def main() -> None: # pragma: no cover
     # Call these function in the order that you want
     # We reverse and complement
     sequence = read_fasta(args.genome_file)
-    probable_genes = predict_genes(sequence, start_regex, stop_regex, shine_regex,
-                                   args.min_gene_len, args.max_shine_dalgarno_distance,
-                                   args.min_gap)
-
-    # Don't forget to uncomment !!!
-    # Call these function in the order that you want
-    # We reverse and complement
-    sequence_rc = reverse_complement(sequence)
-    probable_genes_comp = predict_genes(sequence_rc, start_regex, stop_regex, shine_regex,
-                                        args.min_gene_len, args.max_shine_dalgarno_distance,
-                                        args.min_gap)
-
-    probable_genes_comp = [[len(sequence_rc) - gene[1]+1, len(sequence_rc) - gene[0]+1] for gene in probable_genes_comp]
+    # Both strands are predicted in parallel
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        forward = executor.submit(predict_genes, sequence, START_REGEX, STOP_REGEX, SHINE_REGEX,
+                                  args.min_gene_len, args.max_shine_dalgarno_distance,
+                                  args.min_gap)
+
+        # We reverse and complement while the 5' to 3' strand is processed
+        sequence_rc = reverse_complement(sequence)
+        reverse = executor.submit(predict_genes, sequence_rc, START_REGEX, STOP_REGEX, SHINE_REGEX,
+                                  args.min_gene_len, args.max_shine_dalgarno_distance,
+                                  args.min_gap)
+        probable_genes = forward.result()
+        probable_genes_comp = reverse.result()
+
+    probable_genes_comp = reverse_positions(probable_genes_comp, len(sequence_rc))
 
     # Call to output functions
     #write_genes_pos(args.predicted_genes_file, probable_genes.extend(probable_genes_comp))
@@ -13,6 +13,26 @@ def test_read_fasta():
     assert(sequence == "AGCTTTTCATTCTGACTGCAACGGGCAATATGTCTCTGTGTGGATTAAAAAAAGAGTGTCTGATAGCAGCTTCTGAACTGGTTACCTGCCGTGAGTAAATTAAAATTTTATTGACTTAGGTCACTAAATACTTTAACCAATATAGGCATAGCGCACAGACAGATAAAAATTACAGAGTACACAACATCCATGAAACGCATTAGCACCACCATTACCACCACCATCACCATTACCACAGGTAACGGTGCGGGCTGACGCGTACAGGAAACACAGAAAAAAGCCCGCACCTGACAGTGCGGGCTTTTTTTTTCGACCAAAGGTAACGAGGTAACAACCATGCGAGTGTTGAAGTTCGGCGGTACATCAGTGGCAAATGCAGAACGTTTTCTGCGTGTTGCCGAGGAGGTAACTCAAACCATGAAACGCATTAGCACCACCATTACCACCACCATCACCATTACCACAGGTAACGGTGCGGGCTGA")
 
 
+def test_find_motifs():
+    start_regex = re.compile('AT[TG]|[ATCG]TG')
+    res = find_motifs(start_regex, "AAATTGTGAAATG")
+    res_none = find_motifs(start_regex, "AAAAAAAAAAACCCCCCCCCCC")
+    assert(res == [2, 3, 5, 10])
+    assert(res_none == [])
+
+
+def test_find_motifs_by_phase():
+    stop_regex = re.compile('TA[GA]|TGA')
+    res = find_motifs_by_phase(stop_regex, "TAAATGACCTAGTAA")
+    assert(res == [[0, 9, 12], [4], []])
+
+
+def test_start_regex():
+    codons = ["".join((a, b, c)) for a in "ACGT" for b in "ACGT" for c in "ACGT"]
+    start_codons = [codon for codon in codons if START_REGEX.fullmatch(codon)]
+    assert(start_codons == ['ATG', 'ATT', 'CTG', 'GTG', 'TTG'])
+
+
 def test_find_start():
     start_regex = re.compile('AT[TG]|[ATCG]TG')
     seq_with_start = "AACGGCGTGAAACC"
@@ -49,6 +69,26 @@ def test_has_shine_dalgarno():
     assert(res_sd_too_far == False)
 
 
+def test_shine_regex():
+    seq_without_sd = "ATGAAACGCATTAGCACCACCATTACCACCACCATCACCATTACCACAGGTAACGGTGCGGGCTGA"
+    for motif in ["AGGAGG", "GGAGG", "GAGG", "GGAG", "GGTGG"]:
+        seq_with_sd = motif + "T" * (16 - len(motif)) + seq_without_sd
+        assert(has_shine_dalgarno(SHINE_REGEX, seq_with_sd, 16, 16) == True)
+        assert(has_shine_dalgarno(SHINE_REGEX, seq_with_sd, 13 + len(motif), 16) == False)
+    assert(has_shine_dalgarno(SHINE_REGEX, seq_without_sd, 15, 16) == False)
+
+
+def test_has_shine_dalgarno_indexed():
+    shine_regex = re.compile('A?G?GAGG|GGAG|GG.{1}GG')
+    seq_without_sd = "ATGAAACGCATTAGCACCACCATTACCACCACCATCACCATTACCACAGGTAACGGTGCGGGCTGA"
+    seq_with_sd = "AGGAGGTAACTCAAACC" + seq_without_sd
+    seq_with_sd_too_close = "AGGAGGTAACTC" + seq_without_sd
+    for seq, start, expected in [(seq_with_sd, 17, True), (seq_without_sd, 15, False),
+                                 (seq_with_sd_too_close, 12, False)]:
+        shines = find_motifs(shine_regex, seq)
+        assert(has_shine_dalgarno(shine_regex, seq, start, 16, shines) == expected)
+
+
 def test_predict_genes():
     sequence = read_fasta(Path(__file__).parent / "genome.fasta")
     start_regex = re.compile('AT[TG]|[ATCG]TG')
@@ -60,3 +100,19 @@ def test_predict_genes():
     assert(res[0][1] == 483)
     res_neg = predict_genes(sequence[0:400], start_regex, stop_regex, shine_regex, 50, 16, 40)
     assert(len(res_neg) == 0)
+
+
+def test_predict_genes_defaults():
+    sequence = read_fasta(Path(__file__).parent / "genome.fasta")
+    assert(predict_genes(sequence) == [[337, 483]])
+
+
+def test_reverse_positions():
+    res = reverse_positions([[1, 9], [21, 80]], 100)
+    assert(res == [[92, 100], [21, 80]])
+
+
+def test_wrap_sequence():
+    res = wrap_sequence(b"ACGT" * 40)
+    assert(res.split(b"\n") == [b"ACGT" * 17 + b"AC", b"GT" + b"ACGT" * 17, b"ACGT" * 5])
+    assert(wrap_sequence(b"ACGTAC", 4) == b"ACGT\nAC")